@@ -1,108 +1,218 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder
 from datetime import datetime, timedelta
-import openai
+from functools import lru_cache
 from config import OPENAI_API_KEY
+from finance_assistant import CATEGORIES
 import re
 
-openai.api_key = OPENAI_API_KEY
+@lru_cache(maxsize=None)
+def _openai():
+    # Imported on the first chat request rather than on every page load
+    import openai
+    openai.api_key = OPENAI_API_KEY
+    return openai
+
+_DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+_WORD_RE = re.compile(r'[a-z]+')
+_GREET = frozenset({'hi', 'hello', 'hey'})
+_CATEGORY_WORDS = ('food', 'transport', 'entertainment', 'bills', 'other')
+_CATS = frozenset(_CATEGORY_WORDS)
+_MONTH_NAMES = ('january', 'february', 'march', 'april', 'may', 'june', 'july',
+                'august', 'september', 'october', 'november', 'december')
+_MONTHS = frozenset({'month', 'monthly', *_MONTH_NAMES})
+_SPEND_WORDS = frozenset({'spend', 'spent', 'spending', 'expense', 'expenses', 'cost', 'costs', 'paid'})
+# Everyday words that only name a month or category in a question about spending
+_AMBIGUOUS = frozenset({'may', 'other'})
+
+_FALLBACK_MESSAGE = "I apologize, but I encountered an error. You can ask me about:\n- Spending on specific dates\n- Monthly analysis\n- Category-wise spending\n- Overall summary"
+
+_EMBEDDING_MODEL = 'text-embedding-3-small'
+_SEMANTIC_THRESHOLD = 0.95
+
+def _category_stats(amounts, codes, n_categories):
+    # Per-category totals plus a mask of rows outside mean +/- 2 sample std
+    totals = np.zeros(n_categories)
+    counts = np.zeros(n_categories, dtype=np.int64)
+    for i in range(len(amounts)):
+        totals[codes[i]] += amounts[i]
+        counts[codes[i]] += 1
+    means = totals / np.maximum(counts, 1)
+
+    sq_dev = np.zeros(n_categories)
+    for i in range(len(amounts)):
+        sq_dev[codes[i]] += (amounts[i] - means[codes[i]]) ** 2
+    stds = np.zeros(n_categories)
+    for c in range(n_categories):
+        if counts[c] > 1:
+            stds[c] = np.sqrt(sq_dev[c] / (counts[c] - 1))
+
+    unusual = np.zeros(len(amounts), dtype=np.bool_)
+    for i in range(len(amounts)):
+        c = codes[i]
+        unusual[i] = abs(amounts[i] - means[c]) > 2 * stds[c]
+    return totals, unusual
+
+@lru_cache(maxsize=None)
+def _category_stats_kernel():
+    # numba is imported and the kernel jitted on the first insights request, not on every page load
+    from numba import njit
+    return njit(cache=True)(_category_stats)
+
+class _TransactionArrays:
+    # Column-wise copy of the transaction list, grown in place as transactions are appended
+    def __init__(self, capacity=64):
+        self.size = 0
+        self._amounts = np.empty(capacity, dtype=np.float64)
+        self._dates = np.empty(capacity, dtype='datetime64[D]')
+        self._months = np.empty(capacity, dtype='datetime64[M]')
+        self._codes = np.empty(capacity, dtype=np.int32)
+        self.descriptions = []
+        # Known categories get fixed codes; anything else is appended on first sight
+        self.category_names = list(CATEGORIES)
+        self._category_index = {category: code for code, category in enumerate(CATEGORIES)}
+        self.category_totals = np.zeros(len(CATEGORIES))
+
+    @property
+    def amounts(self):
+        return self._amounts[:self.size]
+
+    @property
+    def dates(self):
+        return self._dates[:self.size]
+
+    @property
+    def months(self):
+        return self._months[:self.size]
+
+    @property
+    def codes(self):
+        return self._codes[:self.size]
+
+    def matches(self, transactions):
+        if len(transactions) < self.size:
+            return False
+        if self.size == 0:
+            return True
+        last = transactions[self.size - 1]
+        return (last['amount'] == self._amounts[self.size - 1]
+                and np.datetime64(last['date'], 'D') == self._dates[self.size - 1])
+
+    def extend(self, transactions):
+        new = transactions[self.size:]
+        if not new:
+            return
+        start, end = self.size, self.size + len(new)
+        if end > len(self._amounts):
+            capacity = len(self._amounts)
+            while capacity < end:
+                capacity *= 2
+            self._amounts = self._grow(self._amounts, capacity)
+            self._dates = self._grow(self._dates, capacity)
+            self._months = self._grow(self._months, capacity)
+            self._codes = self._grow(self._codes, capacity)
+
+        self._amounts[start:end] = [t['amount'] for t in new]
+        self._dates[start:end] = [t['date'] for t in new]
+        self._months[start:end] = self._dates[start:end].astype('datetime64[M]')
+        self._codes[start:end] = [self._category_code(t['category']) for t in new]
+        self.descriptions.extend(t['description'] for t in new)
+        self.size = end
+
+        # Fold the new expenses into the running per-category totals
+        new_amounts, new_codes = self._amounts[start:end], self._codes[start:end]
+        spent = new_amounts < 0
+        totals = np.bincount(new_codes[spent], weights=-new_amounts[spent], minlength=len(self.category_names))
+        totals[:len(self.category_totals)] += self.category_totals
+        self.category_totals = totals
+
+    def expenses_by_category(self):
+        return [
+            (self.category_names[code], total)
+            for code, total in enumerate(self.category_totals)
+            if total > 0
+        ]
+
+    def _grow(self, array, capacity):
+        grown = np.empty(capacity, dtype=array.dtype)
+        grown[:self.size] = array[:self.size]
+        return grown
+
+    def _category_code(self, category):
+        code = self._category_index.get(category)
+        if code is None:
+            code = self._category_index[category] = len(self.category_names)
+            self.category_names.append(category)
+        return code
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'amount': self.amounts,
+            'category': pd.Categorical.from_codes(self.codes, categories=self.category_names),
+            'description': self.descriptions,
+            'date': self.dates.astype('datetime64[ns]'),
+        })
 
 class FinanceAI:
     def __init__(self):
-        self.model = RandomForestRegressor(n_estimators=100)
-        self.label_encoder = LabelEncoder()
+        self._model = None
+        self._fit_key = None
+        self._cat_to_code = {}
+        self._arrays = _TransactionArrays()
+        self._df_cache = (None, None, None)
+        self._clear_reply_cache()
 
-    def chat_response(self, query, transactions):
-        if not transactions:
-            return "I don't have any transaction data to analyze yet. Please add some transactions first!"
+    @property
+    def model(self):
+        # Built on first use so pages that never predict don't pay for it
+        if self._model is None:
+            from sklearn.ensemble import RandomForestRegressor
+            self._model = RandomForestRegressor(n_estimators=50, max_depth=8, n_jobs=-1)
+        return self._model
 
-        df = pd.DataFrame(transactions)
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Financial summary
-        total_spent = abs(df[df['amount'] < 0]['amount'].sum())
-        total_income = df[df['amount'] > 0]['amount'].sum()
-        categories = df[df['amount'] < 0].groupby('category')['amount'].sum().abs()
-        recent_transactions = df.sort_values('date', ascending=False).head(5)
+    def _clear_reply_cache(self):
+        self._exact_cache = {}
+        self._emb_matrix = None
+        self._emb_replies = []
 
-        # Handle basic queries
-        query = query.lower()
-        
-        # Basic responses without OpenAI
-        if any(word in query for word in ['hi', 'hello', 'hey']):
-            return f"Hello! Today's overview:\nTotal spent so far: ${total_spent:.2f}\nWould you like to know more about your spending?"
+    def _get_frame(self, transactions):
+        # Reuse the parsed frame and summaries while the transaction list is unchanged
+        key = (len(transactions), transactions[-1]['date'] if transactions else None)
+        if self._df_cache[0] == key:
+            return self._df_cache[1], self._df_cache[2]
 
-        try:
-            # Enhanced OpenAI context
-            system_prompt = """You are a sophisticated AI financial advisor. Analyze the data and provide:
-            1. Clear, specific answers about transactions and spending
-            2. Actionable financial insights
-            3. Professional yet friendly responses
-            4. Numbers formatted as currency with 2 decimal places
-            5. Specific recommendations based on spending patterns"""
+        # Cached replies were computed from the previous transactions
+        self._clear_reply_cache()
 
-            context = f"""
-            Financial Overview:
-            - Total Income: ${total_income:.2f}
-            - Total Expenses: ${total_spent:.2f}
-            - Net Balance: ${total_income - total_spent:.2f}
-            
-            Category Breakdown:
-            {categories.to_string()}
-            
-            Recent Transactions:
-            {recent_transactions[['date', 'category', 'amount', 'description']].to_string()}
-            
-            User Question: {query}
-            """
+        # Only the rows appended since the last call are copied into the arrays
+        if not self._arrays.matches(transactions):
+            self._arrays = _TransactionArrays()
+        self._arrays.extend(transactions)
 
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": context}
-                ],
-                temperature=0.7,
-                max_tokens=300,
-                presence_penalty=0.6,
-                frequency_penalty=0.3
-            )
-            return response.choices[0].message['content']
-            
-        except Exception as e:
-            # Fallback to basic analysis if OpenAI fails
-            if 'spent most' in query:
-                return self._get_highest_spending(df)
-            elif 'summary' in query:
-                return self._get_summary(df)
-            elif any(category in query for category in ['food', 'transport', 'entertainment', 'bills', 'other']):
-                category = next(cat for cat in ['food', 'transport', 'entertainment', 'bills', 'other'] if cat in query)
-                return self._get_category_analysis(category, df)
-            
-            # Date-specific queries
-            date_match = re.search(r'(\d{4}-\d{2}-\d{2})', query)
-            if date_match or 'today' in query or 'yesterday' in query:
-                return self._get_date_spending(query, df)
-            
-            # Monthly analysis
-            if any(word in query for word in ['month', 'january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october', 'november', 'december']):
-                return self._get_monthly_spending(query, df)
-            
-            return "I apologize, but I encountered an error. You can ask me about:\n- Spending on specific dates\n- Monthly analysis\n- Category-wise spending\n- Overall summary"
+        amounts = self._arrays.amounts
+        neg_mask = amounts < 0
+        df = self._arrays.to_frame()
+        summary = {
+            'total_spent': -amounts[neg_mask].sum(),
+            'total_income': amounts[amounts > 0].sum(),
+            'expense_by_category': self._arrays.expenses_by_category(),
+            'recent_transactions': df.nlargest(5, 'date'),
+        }
+        self._df_cache = (key, df, summary)
+        return df, summary
 
     def prepare_data(self, transactions):
         if not transactions:
             return None, None
             
-        df = pd.DataFrame(transactions)
-        df['date'] = pd.to_datetime(df['date'])
+        df = self._get_frame(transactions)[0].copy()
         df['day_of_week'] = df['date'].dt.dayofweek
         df['day_of_month'] = df['date'].dt.day
         df['month'] = df['date'].dt.month
         
-        df['category_encoded'] = self.label_encoder.fit_transform(df['category'])
+        categories = df['category'].cat.remove_unused_categories()
+        df['category_encoded'] = categories.cat.codes
+        self._cat_to_code = {category: code for code, category in enumerate(categories.cat.categories)}
         
         return df
 
@@ -111,27 +221,29 @@ class FinanceAI:
             return None
             
         features = ['day_of_week', 'day_of_month', 'month', 'category_encoded']
-        X = df[features]
-        y = df['amount']
-        
-        self.model.fit(X, y)
+        # Only refit when the training data has changed since the last call
+        fit_key = (len(df), df['amount'].iloc[-1], df['date'].iloc[-1])
+        if fit_key != self._fit_key:
+            X = df[features].to_numpy()
+            y = df['amount'].to_numpy()
+            self.model.fit(X, y)
+            self._fit_key = fit_key
         
         # Generate future dates
-        future_dates = pd.date_range(start=df['date'].max(), periods=days_ahead + 1)[1:]
-        future_df = pd.DataFrame({
-            'date': future_dates,
-            'day_of_week': future_dates.dayofweek,
-            'day_of_month': future_dates.day,
-            'month': future_dates.month
-        })
+        future_dates = pd.date_range(start=df['date'].max(), periods=days_ahead + 1, freq='D')[1:]
+        base_features = np.empty((days_ahead, len(features)), dtype=np.float32)
+        base_features[:, 0] = future_dates.dayofweek
+        base_features[:, 1] = future_dates.day
+        base_features[:, 2] = future_dates.month
         
-        predictions = {}
-        for category in df['category'].unique():
-            future_df['category_encoded'] = self.label_encoder.transform([category] * len(future_df))
-            category_predictions = self.model.predict(future_df[features])
-            predictions[category] = category_predictions.mean()
+        # Predict every category over the whole horizon in a single call
+        categories = df['category'].unique()
+        codes = [self._cat_to_code[category] for category in categories]
+        future_X = np.tile(base_features, (len(categories), 1))
+        future_X[:, 3] = np.repeat(codes, days_ahead)
+        predictions = self.model.predict(future_X).reshape(len(categories), days_ahead).mean(axis=1)
             
-        return predictions
+        return dict(zip(categories, predictions))
 
     def get_insights(self, transactions):
         df = self.prepare_data(transactions)
@@ -140,27 +252,19 @@ class FinanceAI:
             
         insights = []
         
+        category_spending, unusual = _category_stats_kernel()(
+            df['amount'].to_numpy(dtype=np.float64),
+            df['category_encoded'].to_numpy(dtype=np.int64),
+            len(self._cat_to_code)
+        )
+        
         # Spending patterns
-        category_spending = df.groupby('category')['amount'].sum()
-        highest_expense = category_spending.idxmin()
+        categories = list(self._cat_to_code)
+        highest_expense = categories[category_spending.argmin()]
         
         # Unusual transactions
-        mean_by_category = df.groupby('category')['amount'].mean()
-        std_by_category = df.groupby('category')['amount'].std()
-        
-        for category in df['category'].unique():
-            category_data = df[df['category'] == category]
-            if len(category_data) > 0:
-                mean = mean_by_category[category]
-                std = std_by_category[category] if not pd.isna(std_by_category[category]) else 0
-                
-                unusual = category_data[
-                    (category_data['amount'] < mean - 2*std) | 
-                    (category_data['amount'] > mean + 2*std)
-                ]
-                
-                if len(unusual) > 0:
-                    insights.append(f"Unusual spending detected in {category}")
+        for category in df.loc[unusual, 'category'].unique():
+            insights.append(f"Unusual spending detected in {category}")
         
         # Spending trends
         monthly_spending = df.groupby(df['date'].dt.strftime('%Y-%m'))['amount'].sum()
@@ -172,27 +276,45 @@ class FinanceAI:
         
         return insights
 
-    def chat_response(self, query, transactions):
+    def chat_response(self, query, transactions, stream=False):
         if not transactions:
-            return "I don't have any transaction data to analyze yet. Please add some transactions first!"
+            return self._respond("I don't have any transaction data to analyze yet. Please add some transactions first!", stream)
 
-        df = pd.DataFrame(transactions)
-        df['date'] = pd.to_datetime(df['date'])
+        df, summary = self._get_frame(transactions)
         
         # Financial summary
-        total_spent = abs(df[df['amount'] < 0]['amount'].sum())
-        total_income = df[df['amount'] > 0]['amount'].sum()
-        categories = df[df['amount'] < 0].groupby('category')['amount'].sum().abs()
-        recent_transactions = df.sort_values('date', ascending=False).head(5)
+        total_spent = summary['total_spent']
+        total_income = summary['total_income']
+        categories = summary['expense_by_category']
+        recent_transactions = summary['recent_transactions']
 
         # Handle basic queries
         query = query.lower()
+        query_tokens = set(_WORD_RE.findall(query))
         
         # Basic responses without OpenAI
-        if any(word in query for word in ['hi', 'hello', 'hey']):
-            return f"Hello! Today's overview:\nTotal spent so far: ${total_spent:.2f}\nWould you like to know more about your spending?"
+        if _GREET.intersection(query_tokens):
+            return self._respond(f"Hello! Today's overview:\nTotal spent so far: ${total_spent:.2f}\nWould you like to know more about your spending?", stream)
+
+        # Questions the local analysis can answer never reach OpenAI
+        local_response = self._local_response(query, query_tokens, df, summary)
+        if local_response is not None:
+            return self._respond(local_response, stream)
 
         try:
+            # Reuse replies to identical or near-identical questions
+            cached = self._exact_cache.get(query)
+            query_vec = None
+            if cached is None:
+                try:
+                    query_vec = self._embed(query)
+                    cached = self._semantic_lookup(query_vec)
+                except Exception:
+                    # The reply cache is only an optimization, so a failed lookup counts as a miss
+                    query_vec = None
+            if cached is not None:
+                return self._respond(cached, stream)
+
             # Enhanced OpenAI context
             system_prompt = """You are a sophisticated AI financial advisor. Analyze the data and provide:
             1. Clear, specific answers about transactions and spending
@@ -201,22 +323,32 @@ class FinanceAI:
             4. Numbers formatted as currency with 2 decimal places
             5. Specific recommendations based on spending patterns"""
 
-            context = f"""
-            Financial Overview:
-            - Total Income: ${total_income:.2f}
-            - Total Expenses: ${total_spent:.2f}
-            - Net Balance: ${total_income - total_spent:.2f}
-            
-            Category Breakdown:
-            {categories.to_string()}
-            
-            Recent Transactions:
-            {recent_transactions[['date', 'category', 'amount', 'description']].to_string()}
-            
-            User Question: {query}
-            """
+            category_lines = [f"{category}: ${amount:.2f}" for category, amount in categories]
+            recent_lines = [
+                f"{date}\t{category}\t{amount:.2f}\t{description}"
+                for date, category, amount, description in zip(
+                    np.datetime_as_string(recent_transactions['date'].values, unit='D'),
+                    recent_transactions['category'].values,
+                    recent_transactions['amount'].values,
+                    recent_transactions['description'].values
+                )
+            ]
+            context = '\n'.join([
+                "Financial Overview:",
+                f"- Total Income: ${total_income:.2f}",
+                f"- Total Expenses: ${total_spent:.2f}",
+                f"- Net Balance: ${total_income - total_spent:.2f}",
+                "",
+                "Category Breakdown:",
+                *category_lines,
+                "",
+                "Recent Transactions (date, category, amount, description):",
+                *recent_lines,
+                "",
+                f"User Question: {query}"
+            ])
 
-            response = openai.ChatCompletion.create(
+            response = _openai().ChatCompletion.create(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -225,30 +357,82 @@ class FinanceAI:
                 temperature=0.7,
                 max_tokens=300,
                 presence_penalty=0.6,
-                frequency_penalty=0.3
+                frequency_penalty=0.3,
+                stream=stream
             )
-            return response.choices[0].message['content']
+            if stream:
+                return self._stream_tokens(response, lambda reply: self._remember_reply(query, query_vec, reply))
+            reply = response.choices[0].message['content']
+            self._remember_reply(query, query_vec, reply)
+            return reply
             
         except Exception as e:
-            # Fallback to basic analysis if OpenAI fails
-            if 'spent most' in query:
-                return self._get_highest_spending(df)
-            elif 'summary' in query:
-                return self._get_summary(df)
-            elif any(category in query for category in ['food', 'transport', 'entertainment', 'bills', 'other']):
-                category = next(cat for cat in ['food', 'transport', 'entertainment', 'bills', 'other'] if cat in query)
-                return self._get_category_analysis(category, df)
-            
-            # Date-specific queries
-            date_match = re.search(r'(\d{4}-\d{2}-\d{2})', query)
-            if date_match or 'today' in query or 'yesterday' in query:
-                return self._get_date_spending(query, df)
-            
-            # Monthly analysis
-            if any(word in query for word in ['month', 'january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october', 'november', 'december']):
-                return self._get_monthly_spending(query, df)
-            
-            return "I apologize, but I encountered an error. You can ask me about:\n- Spending on specific dates\n- Monthly analysis\n- Category-wise spending\n- Overall summary"
+            return self._respond(_FALLBACK_MESSAGE, stream)
+
+    def chat_response_stream(self, query, transactions):
+        return self.chat_response(query, transactions, stream=True)
+
+    def _respond(self, text, stream):
+        return iter([text]) if stream else text
+
+    def _stream_tokens(self, response, on_complete):
+        parts = []
+        try:
+            for chunk in response:
+                token = chunk.choices[0].delta.get('content', '')
+                parts.append(token)
+                yield token
+        except Exception:
+            yield _FALLBACK_MESSAGE
+        else:
+            on_complete(''.join(parts))
+
+    def _embed(self, text):
+        response = _openai().Embedding.create(model=_EMBEDDING_MODEL, input=text)
+        vec = np.asarray(response['data'][0]['embedding'], dtype=np.float32)
+        return vec / np.linalg.norm(vec)
+
+    def _semantic_lookup(self, query_vec):
+        if self._emb_matrix is None:
+            return None
+        similarities = self._emb_matrix @ query_vec
+        best = int(similarities.argmax())
+        if similarities[best] > _SEMANTIC_THRESHOLD:
+            return self._emb_replies[best]
+        return None
+
+    def _remember_reply(self, query, query_vec, reply):
+        self._exact_cache[query] = reply
+        if query_vec is None:
+            return
+        if self._emb_matrix is None:
+            self._emb_matrix = query_vec[np.newaxis, :]
+        else:
+            self._emb_matrix = np.vstack([self._emb_matrix, query_vec])
+        self._emb_replies.append(reply)
+
+    def _local_response(self, query, query_tokens, df, summary):
+        if not _SPEND_WORDS.intersection(query_tokens):
+            query_tokens = query_tokens - _AMBIGUOUS
+
+        if 'spent most' in query:
+            return self._get_highest_spending()
+        elif 'summary' in query:
+            return self._get_summary(summary)
+        elif _CATS.intersection(query_tokens):
+            category = next(cat for cat in _CATEGORY_WORDS if cat in query_tokens)
+            return self._get_category_analysis(category, df)
+        
+        # Date-specific queries
+        date_match = _DATE_RE.search(query)
+        if date_match or 'today' in query or 'yesterday' in query:
+            return self._get_date_spending(query, df)
+        
+        # Monthly analysis
+        if _MONTHS.intersection(query_tokens):
+            return self._get_monthly_spending(query, query_tokens)
+        
+        return None
 
     def _get_date_spending(self, query, df):
         if 'today' in query:
@@ -256,39 +440,56 @@ class FinanceAI:
         elif 'yesterday' in query:
             date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
         else:
-            date_match = re.search(r'(\d{4}-\d{2}-\d{2})', query)
-            date = date_match.group(1)
+            date = _DATE_RE.search(query).group(1)
 
-        day_transactions = df[df['date'].dt.strftime('%Y-%m-%d') == date]
+        try:
+            day = np.datetime64(date, 'D')
+        except ValueError:
+            return f"No transactions found for {date}"
+        day_transactions = df[df['date'].values.astype('datetime64[D]') == day]
         if len(day_transactions) == 0:
             return f"No transactions found for {date}"
 
         total_spent = abs(day_transactions[day_transactions['amount'] < 0]['amount'].sum())
         response = f"On {date}, you spent ${total_spent:.2f}\n\nBreakdown:"
         
-        for _, row in day_transactions.iterrows():
-            if row['amount'] < 0:
-                response += f"\n- ${abs(row['amount']):.2f} on {row['category']}: {row['description']}"
+        spent = day_transactions[day_transactions['amount'] < 0]
+        response += ''.join(
+            f"\n- ${-amount:.2f} on {category}: {description}"
+            for amount, category, description in zip(
+                spent['amount'].values, spent['category'].values, spent['description'].values
+            )
+        )
         
         return response
 
-    def _get_monthly_spending(self, query, df):
-        current_month = datetime.now().strftime('%Y-%m')
-        if 'last month' in query:
-            target_month = (datetime.now().replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+    def _get_monthly_spending(self, query, query_tokens):
+        now = datetime.now()
+        month_name = next((name for name in _MONTH_NAMES if name in query_tokens), None)
+        if month_name is not None:
+            # A named month means its most recent occurrence, this year or last
+            month = _MONTH_NAMES.index(month_name) + 1
+            year = now.year if month <= now.month else now.year - 1
+            target_month = f'{year}-{month:02d}'
+        elif 'last month' in query:
+            target_month = (now.replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
         else:
-            target_month = current_month
+            target_month = now.strftime('%Y-%m')
 
-        month_data = df[df['date'].dt.strftime('%Y-%m') == target_month]
-        if len(month_data) == 0:
+        arrays = self._arrays
+        in_month = arrays.months == np.datetime64(target_month, 'M')
+        if not in_month.any():
             return f"No transactions found for {target_month}"
 
-        total_spent = abs(month_data[month_data['amount'] < 0]['amount'].sum())
-        category_spending = month_data[month_data['amount'] < 0].groupby('category')['amount'].sum().abs()
+        spent = in_month & (arrays.amounts < 0)
+        category_spending = np.bincount(
+            arrays.codes[spent], weights=-arrays.amounts[spent], minlength=len(arrays.category_names)
+        )
+        total_spent = category_spending.sum()
 
         response = f"Monthly Analysis for {target_month}:\nTotal spent: ${total_spent:.2f}\n\nCategory breakdown:"
-        for category, amount in category_spending.items():
-            response += f"\n- {category}: ${amount:.2f}"
+        for code in np.flatnonzero(category_spending):
+            response += f"\n- {arrays.category_names[code]}: ${category_spending[code]:.2f}"
         
         return response
 
@@ -298,29 +499,38 @@ class FinanceAI:
             return f"No transactions found for category: {category}"
 
         total_spent = abs(category_data[category_data['amount'] < 0]['amount'].sum())
-        recent_transactions = category_data.sort_values('date', ascending=False).head(3)
+        recent_transactions = category_data.nlargest(3, 'date')
 
         response = f"Analysis for {category}:\nTotal spent: ${total_spent:.2f}\n\nRecent transactions:"
-        for _, row in recent_transactions.iterrows():
-            if row['amount'] < 0:
-                response += f"\n- {row['date'].strftime('%Y-%m-%d')}: ${abs(row['amount']):.2f} - {row['description']}"
+        spent = recent_transactions[recent_transactions['amount'] < 0]
+        response += ''.join(
+            f"\n- {date}: ${-amount:.2f} - {description}"
+            for date, amount, description in zip(
+                np.datetime_as_string(spent['date'].values, unit='D'),
+                spent['amount'].values,
+                spent['description'].values
+            )
+        )
         
         return response
 
-    def _get_highest_spending(self, df):
-        category_spending = df[df['amount'] < 0].groupby('category')['amount'].sum().abs()
-        highest_category = category_spending.idxmax()
-        highest_amount = category_spending.max()
+    def _get_highest_spending(self):
+        totals = self._arrays.category_totals
+        highest = totals.argmax()
+        if totals[highest] <= 0:
+            return "No expenses found"
+        highest_category = self._arrays.category_names[highest]
+        highest_amount = totals[highest]
         
         return f"You spent most on {highest_category}: ${highest_amount:.2f}"
 
-    def _get_summary(self, df):
-        total_spent = abs(df[df['amount'] < 0]['amount'].sum())
-        total_income = df[df['amount'] > 0]['amount'].sum()
-        category_spending = df[df['amount'] < 0].groupby('category')['amount'].sum().abs()
+    def _get_summary(self, summary):
+        total_spent = summary['total_spent']
+        total_income = summary['total_income']
+        category_spending = summary['expense_by_category']
 
         response = f"Financial Summary:\nTotal Income: ${total_income:.2f}\nTotal Expenses: ${total_spent:.2f}\n\nCategory-wise spending:"
-        for category, amount in category_spending.items():
+        for category, amount in category_spending:
             response += f"\n- {category}: ${amount:.2f}"
         
         return response
\ No newline at end of file
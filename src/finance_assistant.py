@@ -1,9 +1,37 @@
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
+from collections import defaultdict
 import json
+import itertools
+import threading
 import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CATEGORIES = ["Income", "Food", "Transport", "Entertainment", "Bills", "Other"]
+
+# Process-wide so versions stay unique across FinanceAssistant instances
+_versions = itertools.count(1)
+
+def read_json(path):
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def write_json(path, data):
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
 class FinanceAssistant:
     def __init__(self):
         self.data_file = Path("data/transactions.json")
@@ -11,41 +39,69 @@ class FinanceAssistant:
         self.data_file.parent.mkdir(exist_ok=True)
         self.transactions = self.load_transactions()
         self.budgets = self.load_budgets()
+        self._dirty_tx = False
+        self._dirty_budgets = False
+        self._df = None
+        # One instance is shared by every session's script thread
+        self._lock = threading.Lock()
+        self.version = next(_versions)
+        self._monthly_cat_totals = defaultdict(float)
+        for t in self.transactions:
+            self._index_transaction(t)
+
+    def _index_transaction(self, transaction):
+        if transaction['amount'] < 0:
+            key = (transaction['date'][:7], transaction['category'])
+            self._monthly_cat_totals[key] -= transaction['amount']
 
     def load_transactions(self):
         if self.data_file.exists():
-            with open(self.data_file, 'r') as f:
-                return json.load(f)
+            return read_json(self.data_file)
         return []
 
     def load_budgets(self):
         if self.budget_file.exists():
-            with open(self.budget_file, 'r') as f:
-                return json.load(f)
+            return read_json(self.budget_file)
         return {}
 
     def save_budgets(self):
-        with open(self.budget_file, 'w') as f:
-            json.dump(self.budgets, f)
+        write_json(self.budget_file, self.budgets)
 
     def set_budget(self, category, amount):
-        self.budgets[category] = float(amount)
-        self.save_budgets()
+        with self._lock:
+            self.budgets[category] = float(amount)
+            self._dirty_budgets = True
+            self.version = next(_versions)
 
-    def get_monthly_expenses_by_category(self, category):
-        current_month = datetime.now().strftime("%Y-%m")
-        monthly_expenses = sum(
-            abs(t['amount']) for t in self.transactions 
-            if t['category'] == category 
-            and t['amount'] < 0 
-            and t['date'].startswith(current_month)
-        )
-        return monthly_expenses
+    def get_dataframe(self):
+        # Built once and reused until the next add_transaction
+        with self._lock:
+            if self._df is None:
+                df = pd.DataFrame(self.transactions, columns=['amount', 'category', 'description', 'date'])
+                df['amount'] = df['amount'].astype(float)
+                df['expense'] = (-df['amount']).clip(lower=0)
+                df['income'] = df['amount'].clip(lower=0)
+                df['date'] = pd.to_datetime(df['date'])
+                df['category'] = df['category'].astype('category')
+                self._df = df
+            return self._df
+
+    def get_monthly_expenses_by_category(self, category, current_month=None):
+        if current_month is None:
+            current_month = datetime.now().strftime("%Y-%m")
+        return self._monthly_cat_totals.get((current_month, category), 0.0)
+
+    def summarize(self):
+        return {
+            'income': self.get_total_income(),
+            'expenses': self.get_total_expenses()
+        }
 
     def get_budget_status(self):
+        current_month = datetime.now().strftime("%Y-%m")
         status = {}
-        for category, budget in self.budgets.items():
-            spent = self.get_monthly_expenses_by_category(category)
+        for category, budget in list(self.budgets.items()):
+            spent = self.get_monthly_expenses_by_category(category, current_month)
             status[category] = {
                 'budget': budget,
                 'spent': spent,
@@ -55,24 +111,22 @@ class FinanceAssistant:
         return status
 
     def get_spending_trends(self, days=30):
-        df = pd.DataFrame(self.transactions)
+        df = self.get_dataframe()
         if len(df) == 0:
             return pd.DataFrame()
         
-        df['date'] = pd.to_datetime(df['date'])
-        df['amount'] = df['amount'].astype(float)
-        
         last_date = df['date'].max()
         start_date = last_date - timedelta(days=days)
         
         df = df[df['date'] >= start_date]
-        daily_spending = df.groupby(['date', 'category'])['amount'].sum().reset_index()
+        # Categories with no rows in the window would otherwise survive as empty groups
+        df = df.assign(category=df['category'].cat.remove_unused_categories())
+        daily_spending = df.groupby(['date', 'category'], observed=True)['amount'].sum().reset_index()
         
         return daily_spending
 
     def save_transactions(self):
-        with open(self.data_file, 'w') as f:
-            json.dump(self.transactions, f)
+        write_json(self.data_file, self.transactions)
 
     def add_transaction(self, amount, category, description, date):
         transaction = {
@@ -81,11 +135,25 @@ class FinanceAssistant:
             'description': description,
             'date': date
         }
-        self.transactions.append(transaction)
-        self.save_transactions()
+        with self._lock:
+            self.transactions.append(transaction)
+            self._index_transaction(transaction)
+            self._df = None
+            self._dirty_tx = True
+            self.version = next(_versions)
+
+    def flush(self):
+        # Writes are batched: callers flush once after a group of changes
+        with self._lock:
+            if self._dirty_tx:
+                self.save_transactions()
+                self._dirty_tx = False
+            if self._dirty_budgets:
+                self.save_budgets()
+                self._dirty_budgets = False
 
     def get_total_expenses(self):
-        return sum(t['amount'] for t in self.transactions if t['amount'] < 0)
+        return -self.get_dataframe()['expense'].sum()
 
     def get_total_income(self):
-        return sum(t['amount'] for t in self.transactions if t['amount'] > 0)
\ No newline at end of file
+        return self.get_dataframe()['income'].sum()
\ No newline at end of file